@@ -143,12 +143,18 @@ class ConfigManager:
         for config_type in self.config_types:
             persistent_file = self.get_config_path(config_type, persistent=True)
             example_file = self.get_config_path(config_type, persistent=False)
-            
+
+            # One stat call covers existence, size and mtime
+            try:
+                st = persistent_file.stat()
+            except FileNotFoundError:
+                st = None
+
             info["configs"][config_type] = {
-                "persistent_exists": persistent_file.exists(),
-                "persistent_size": persistent_file.stat().st_size if persistent_file.exists() else 0,
+                "persistent_exists": st is not None,
+                "persistent_size": st.st_size if st else 0,
                 "example_exists": example_file.exists(),
-                "last_modified": persistent_file.stat().st_mtime if persistent_file.exists() else 0
+                "last_modified": st.st_mtime if st else 0
             }
         
         return info
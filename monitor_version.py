@@ -1,27 +1,37 @@
 #!/usr/bin/env python3
 import time
 import sys
+import requests
+
+STATUS_URL = "https://exciting-liberation-production.up.railway.app/api/status"
 
 def check_version():
-    # This will be replaced with actual server_status call
-    pass
+    """Return the version reported by the server, or None if it isn't answering"""
+    try:
+        response = requests.get(STATUS_URL, timeout=5)
+        return response.json().get('version')
+    except (requests.RequestException, ValueError):
+        return None
 
-start_time = time.time()
-target_version = "2.3.2"
+target_version = sys.argv[1] if len(sys.argv) > 1 else "2.3.2"
 timeout = 90
 
-while time.time() - start_time < timeout:
-    # Check server status - placeholder for actual implementation
+# Poll quickly at first and back off, so a fast deploy is seen within
+# a fraction of a second without hammering a slow one
+deadline = time.monotonic() + timeout
+delay = 0.1
+
+while time.monotonic() < deadline:
     print(f"Checking server status at {time.strftime('%H:%M:%S')}...")
-    
-    # Simulate version check - will be replaced with actual server_status() call
-    current_version = "checking..."
-    
+
+    current_version = check_version()
+
     if current_version == target_version:
         print(f"✓ Version {target_version} detected!")
         sys.exit(0)
-    
-    time.sleep(5)
+
+    time.sleep(min(delay, max(0, deadline - time.monotonic())))
+    delay = min(delay * 1.5, 2.0)
 
 print(f"✗ Timeout after {timeout} seconds - version {target_version} not detected")
-sys.exit(1)
\ No newline at end of file
+sys.exit(1)
@@ -1,8 +1,18 @@
 #!/usr/bin/env python3
 import re
-from typing import Dict, Any, List
+import random
+import asyncio
+from typing import Dict, Any, List, Tuple
+
+# Script syntax patterns
+_IF_RE = re.compile(r'(\w+) equals (\w+) then (.+)')
+_REPEAT_RE = re.compile(r'(\d+)\s*\{(.+)\}', re.DOTALL)
+_FUNCTION_RE = re.compile(r'(\w+)\s*\{(.+)\}', re.DOTALL)
 
 class ScriptEngine:
+    __slots__ = ('server', 'variables', 'functions', 'user_functions',
+                 '_parse_cache', '_block_cache')
+    
     def __init__(self, server):
         self.server = server
         self.variables: Dict[str, Any] = {}
@@ -21,10 +31,12 @@ class ScriptEngine:
             'give': self._give,
             'take': self._take
         }
-        self.user_functions: Dict[str, List[Dict]] = {}  # Custom functions
+        self.user_functions: Dict[str, List[Tuple]] = {}  # Custom functions
+        self._parse_cache: Dict[str, List[Tuple]] = {}  # Compiled scripts by text
+        self._block_cache: Dict[str, List[Tuple]] = {}  # Compiled { ... } blocks by text
     
-    def parse_script(self, script_text: str) -> List[Dict]:
-        """Parse script into executable commands"""
+    def parse_script(self, script_text: str) -> List[Tuple[str, str]]:
+        """Parse script into (command, args) pairs"""
         commands = []
         lines = script_text.strip().split('\n')
         
@@ -38,25 +50,62 @@ class ScriptEngine:
             cmd = parts[0]
             args = parts[1] if len(parts) > 1 else ""
             
-            commands.append({'command': cmd, 'args': args})
+            commands.append((cmd, args))
         
         return commands
     
+    def _parse_block(self, commands_text: str) -> List[Tuple[str, str]]:
+        """Parse the ';'-separated commands inside a { ... } block"""
+        commands = []
+        for line in commands_text.split(';'):
+            line = line.strip()
+            if line:
+                parts = line.split(' ', 1)
+                cmd = parts[0]
+                cmd_args = parts[1] if len(parts) > 1 else ""
+                commands.append((cmd, cmd_args))
+        return commands
+    
+    def _compile(self, commands: List[Tuple[str, str]]) -> List[Tuple]:
+        """Resolve parsed commands to (handler, args) ops; unknown commands get None"""
+        ops = []
+        for cmd, args in commands:
+            if cmd == 'random_say':
+                # Split the choices once here rather than on every run
+                choices = tuple(m.strip() for m in args.split('|'))
+                ops.append((self._random_say_choices, choices))
+            else:
+                ops.append((self.functions.get(cmd), args))
+        return ops
+    
+    def compile_script(self, script_text: str) -> List[Tuple]:
+        """Get the compiled ops for a script, parsing it only the first time it runs"""
+        ops = self._parse_cache.get(script_text)
+        if ops is None:
+            ops = self._compile(self.parse_script(script_text))
+            self._parse_cache[script_text] = ops
+        return ops
+    
+    def _compile_block(self, commands_text: str) -> List[Tuple]:
+        """Get the compiled ops for a { ... } block body"""
+        ops = self._block_cache.get(commands_text)
+        if ops is None:
+            ops = self._compile(self._parse_block(commands_text))
+            self._block_cache[commands_text] = ops
+        return ops
+    
     async def execute_script(self, script_text: str, bot_name: str):
         """Execute a script for a bot"""
-        commands = self.parse_script(script_text)
-        await self._execute_commands(commands, bot_name)
+        await self._execute_commands(self.compile_script(script_text), bot_name)
     
-    async def _execute_commands(self, commands: List[Dict], bot_name: str):
-        """Execute a list of commands"""
+    async def _execute_commands(self, ops: List[Tuple], bot_name: str):
+        """Execute a list of compiled (handler, args) ops"""
         i = 0
-        while i < len(commands):
-            cmd_data = commands[i]
-            cmd = cmd_data['command']
-            args = cmd_data['args']
+        while i < len(ops):
+            handler, args = ops[i]
             
-            if cmd in self.functions:
-                result = await self.functions[cmd](bot_name, args)
+            if handler:
+                result = await handler(bot_name, args)
                 # Handle control flow returns
                 if isinstance(result, dict) and 'jump' in result:
                     i = result['jump']
@@ -70,42 +119,30 @@ class ScriptEngine:
             # Handle item scripts - broadcast to user's room
             item_id = bot_name.split("_", 1)[1]  # Remove prefix
             # Find which user used the item (simplified - could be enhanced)
-            for user in self.server.users.values():
-                if item_id in user.inventory:
-                    await self.server.send_to_room(user.room_id, message)
-                    break
-            # Also check web users
             for web_user in self.server.web_users.values():
                 if item_id in web_user.inventory:
-                    self.server.socketio.emit('message', {'text': message}, room=web_user.room_id)
-                    self.server.send_to_room(web_user.room_id, message, exclude_user=web_user.name)
+                    self.server.send_to_room(web_user.room_id, message)
                     break
         else:
             bot = self.server.bots.get(bot_name)
             if bot:
                 # Send message to all web users in the same room
-                message_text = f"{bot.name} says: {message}"
-                for web_user in self.server.web_users.values():
-                    if web_user.room_id == bot.room_id:
-                        self.server.socketio.emit('message', {'text': message_text}, room=web_user.session_id)
+                self.server.send_to_room(bot.room_id, f"{bot.name} says: {message}")
     
     async def _move(self, bot_name: str, room_id: str):
         """Move bot to a different room"""
         bot = self.server.bots.get(bot_name)
         if bot and room_id in self.server.rooms:
             old_room = bot.room_id
-            bot.room_id = room_id
+            self.server.move_bot(bot, room_id)
             
             # Announce the move to users in both rooms
-            for web_user in self.server.web_users.values():
-                if web_user.room_id == old_room:
-                    self.server.socketio.emit('message', {'text': f'{bot.name} leaves the room.'}, room=web_user.session_id)
-                elif web_user.room_id == room_id:
-                    self.server.socketio.emit('message', {'text': f'{bot.name} enters the room.'}, room=web_user.session_id)
+            self.server.send_to_room(old_room, f'{bot.name} leaves the room.')
+            if room_id != old_room:
+                self.server.send_to_room(room_id, f'{bot.name} enters the room.')
     
     async def _wait(self, bot_name: str, seconds: str):
         """Wait for specified seconds"""
-        import asyncio
         try:
             await asyncio.sleep(float(seconds))
         except ValueError:
@@ -125,7 +162,7 @@ class ScriptEngine:
     async def _if(self, bot_name: str, condition: str):
         """Simple if statement: if var equals value then command"""
         # Simple parser for: var equals value then command
-        match = re.match(r'(\w+) equals (\w+) then (.+)', condition)
+        match = _IF_RE.match(condition)
         if match:
             var_name, expected, command = match.groups()
             actual = await self._get(bot_name, var_name)
@@ -140,64 +177,42 @@ class ScriptEngine:
     async def _broadcast(self, bot_name: str, message: str):
         """Broadcast message to all users"""
         message_text = f"[{bot_name}] {message}"
-        for web_user in self.server.web_users.values():
-            self.server.socketio.emit('message', {'text': message_text}, room=web_user.session_id)
+        self.server.send_to_all(message_text)
     
     async def _random_say(self, bot_name: str, messages: str):
         """Say one of several random messages: random_say msg1|msg2|msg3"""
-        import random
-        message_list = messages.split('|')
-        if message_list:
-            chosen = random.choice(message_list).strip()
-            await self._say(bot_name, chosen)
+        await self._random_say_choices(bot_name, tuple(m.strip() for m in messages.split('|')))
+    
+    async def _random_say_choices(self, bot_name: str, choices: Tuple[str, ...]):
+        """Compiled form of random_say with the choices already split"""
+        await self._say(bot_name, random.choice(choices))
     
     async def _repeat(self, bot_name: str, args: str):
         """Repeat commands: repeat 3 { say Hello; wait 1 }"""
-        import re
-        match = re.match(r'(\d+)\s*\{(.+)\}', args, re.DOTALL)
+        match = _REPEAT_RE.match(args)
         if not match:
             return
         
         count = int(match.group(1))
         commands_text = match.group(2).strip()
         
-        # Parse commands inside the block
-        commands = []
-        for line in commands_text.split(';'):
-            line = line.strip()
-            if line:
-                parts = line.split(' ', 1)
-                cmd = parts[0]
-                cmd_args = parts[1] if len(parts) > 1 else ""
-                commands.append({'command': cmd, 'args': cmd_args})
-        
-        # Execute the block multiple times
+        # Parse the block once, then execute it multiple times
+        ops = self._compile_block(commands_text)
         for _ in range(count):
-            await self._execute_commands(commands, bot_name)
+            await self._execute_commands(ops, bot_name)
     
     async def _function(self, bot_name: str, args: str):
         """Define a function: function greet { say Hello; wait 1 }"""
-        import re
-        match = re.match(r'(\w+)\s*\{(.+)\}', args, re.DOTALL)
+        match = _FUNCTION_RE.match(args)
         if not match:
             return
         
         func_name = match.group(1)
         commands_text = match.group(2).strip()
         
-        # Parse function commands
-        commands = []
-        for line in commands_text.split(';'):
-            line = line.strip()
-            if line:
-                parts = line.split(' ', 1)
-                cmd = parts[0]
-                cmd_args = parts[1] if len(parts) > 1 else ""
-                commands.append({'command': cmd, 'args': cmd_args})
-        
-        # Store function
+        # Store compiled function body
         func_key = f"{bot_name}_{func_name}"
-        self.user_functions[func_key] = commands
+        self.user_functions[func_key] = self._compile_block(commands_text)
     
     async def _call(self, bot_name: str, func_name: str):
         """Call a user-defined function: call greet"""
@@ -212,14 +227,14 @@ class ScriptEngine:
             return
         
         item_id, user_name = parts
-        user = self.server.users.get(user_name)
+        user = self.server.web_users.get(user_name)
         bot = self.server.bots.get(bot_name)
         
         if user and bot and item_id in bot.inventory:
-            bot.inventory.remove(item_id)
+            bot.inventory.discard(item_id)
             user.inventory.append(item_id)
             await self._say(bot_name, f"*gives {self.server.items[item_id].name} to {user_name}*")
-            self.server.save_user(user)
+            self.server.save_user_data(user)
     
     async def _take(self, bot_name: str, args: str):
         """Take item from user: take magic_book alice"""
@@ -228,11 +243,11 @@ class ScriptEngine:
             return
         
         item_id, user_name = parts
-        user = self.server.users.get(user_name)
+        user = self.server.web_users.get(user_name)
         bot = self.server.bots.get(bot_name)
         
         if user and bot and item_id in user.inventory:
             user.inventory.remove(item_id)
-            bot.inventory.append(item_id)
+            bot.inventory.add(item_id)
             await self._say(bot_name, f"*takes {self.server.items[item_id].name} from {user_name}*")
-            self.server.save_user(user)
+            self.server.save_user_data(user)
@@ -4,18 +4,55 @@ The Text Spot - Web-Only Multi-User Text Space Server
 Simplified version focused on web interface only
 """
 import os
+import sys
+import signal
 import json
 import yaml
+import hashlib
+import queue
+import atexit
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import logging.handlers
 from datetime import datetime
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, Optional, List
 from flask import Flask, render_template, request, jsonify
 from flask_socketio import SocketIO, emit, join_room, leave_room, disconnect
 from script_engine import ScriptEngine
 from config_manager import ConfigManager
 from command_registry import Command, CommandRegistry
-from functools import wraps
+from functools import wraps, lru_cache
+
+# Prefer the LibYAML C parser when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+# orjson is optional; stdlib json is used when it isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# uvloop is optional; the bot script loop falls back to the stdlib event loop
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+class _OrjsonCodec:
+    """json-module shim so Socket.IO can encode packets with orjson"""
+    @staticmethod
+    def dumps(obj, *args, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    @staticmethod
+    def loads(s, *args, **kwargs):
+        return orjson.loads(s)
 
 # Version tracking
 VERSION = "2.9.4"
@@ -26,6 +63,116 @@ SERVER_NAME = os.getenv("SERVER_NAME", "The Text Spot")
 # IP Whitelist for API endpoints
 API_WHITELIST = ["98.33.93.100"]
 
+# Socket.IO room holding every logged-in socket, used for server-wide messages
+ALL_USERS_ROOM = "__all_users__"
+
+# Saves within this many seconds of each other share one users.json write
+USER_SAVE_DELAY = 0.5
+# ...unless this many users are waiting on it, when it is written straight away
+USER_SAVE_BATCH = 50
+
+# Command names for prefix resolution, in match order
+BASIC_COMMANDS = (
+    'help', 'version', 'whoami', 'look', 'who', 'inventory', 'say', 'whisper',
+    'get', 'take', 'drop', 'examine', 'exam', 'use', 'go', 'move',
+    'north', 'south', 'east', 'west'
+)
+ADMIN_COMMANDS = ('teleport', 'broadcast', 'kick', 'switchuser', 'script')
+ALL_COMMANDS = BASIC_COMMANDS + ADMIN_COMMANDS
+_BASIC_COMMAND_SET = frozenset(BASIC_COMMANDS)
+_ALL_COMMAND_SET = frozenset(ALL_COMMANDS)
+
+# Single-letter aliases (exact matches only)
+COMMAND_ALIASES = {
+    'n': 'north', 's': 'south', 'e': 'east', 'w': 'west',
+    'l': 'look', 'g': 'go', 'i': 'inventory', 'h': 'help', 'v': 'version'
+}
+
+@lru_cache(maxsize=1024)
+def resolve_command_name(cmd, is_admin):
+    """Resolve a typed command to a command name using most-significant match.
+
+    Results are memoised per (cmd, is_admin) since the command tables are fixed.
+    """
+    # Check exact alias match first (only for single letters)
+    if len(cmd) == 1 and cmd in COMMAND_ALIASES:
+        return COMMAND_ALIASES[cmd]
+    
+    # Command tables based on user privileges
+    if is_admin:
+        all_commands, command_set = ALL_COMMANDS, _ALL_COMMAND_SET
+    else:
+        all_commands, command_set = BASIC_COMMANDS, _BASIC_COMMAND_SET
+    
+    # Find exact match
+    if cmd in command_set:
+        return cmd
+    
+    # Find partial matches
+    matches = [c for c in all_commands if c.startswith(cmd)]
+    
+    if len(matches) == 1:
+        return matches[0]
+    elif len(matches) > 1:
+        return f"AMBIGUOUS:{','.join(matches)}"
+    else:
+        return cmd  # Return original if no matches
+
+# Help text, built once (admins get the extra section)
+_BASIC_HELP = """
+Available commands:
+  look (l) - See room description and contents
+  go <exit> (g) - Move to another room (or just type the exit name)
+  north/south/east/west (n/s/e/w) - Move in cardinal directions
+  say <message> (") - Speak to everyone in the room
+  whisper <user> <message> - Send private message to user
+  who - List all online users
+  whoami - Show your username and admin status
+  inventory (i) - Show your items
+  get <item> - Pick up an item
+  drop <item> - Drop an item
+  put <item> [in <container>] - Put item down or in container
+  give <item> to <target> - Give item to user or bot
+  examine <item> - Look at an item closely
+  use <item> - Use an item
+  open <item> - Open a container
+  close <item> - Close a container
+  motd - View message of the day
+  quit (logout) - Log out and return to login screen
+  help (h) - Show this help
+  version (v) - Show server version
+"""
+_ADMIN_HELP = """
+Admin commands:
+  teleport [room] - Jump to room (no args lists rooms)
+  broadcast <message> - Send message to all users
+  kick <user> - Disconnect a user
+  switchuser <name> - Switch to different user
+  script <name> - Execute a bot script
+  motd [message] - View or set message of the day
+"""
+HELP_TEXT = _BASIC_HELP.strip()
+ADMIN_HELP_TEXT = (_BASIC_HELP + _ADMIN_HELP).strip()
+
+# Command overview shown when tab-completing an empty command line
+COMPLETION_HELP_TEXT = (
+    "Available Commands:\n\n"
+    "  Basic:        help, version, whoami, who, motd, quit (logout)\n"
+    "  Look:         look (l, examine, exam) [target]\n"
+    "  Items:        get (take) <item>, drop <item>, use <item>\n"
+    "  Complex:      put <item> [in <container>], give <item> to <target>\n"
+    "  Interact:     open <item>, close <item>\n"
+    "  Chat:         say <message>, whisper <target> <message>\n"
+    "  Movement:     go (move, g) <direction>, north (n), south (s), east (e), west (w)\n"
+    "  Inventory:    inventory (i)\n"
+)
+ADMIN_COMPLETION_HELP_TEXT = COMPLETION_HELP_TEXT + "\n  Admin:        teleport [room], motd [message]"
+
+def intern_id(value):
+    """Intern an id or name string; non-string ids are returned unchanged"""
+    # Rooms, inventories and user sets then share one object per id
+    return sys.intern(value) if isinstance(value, str) else value
+
 def require_whitelisted_ip(f):
     """Decorator to restrict API access to whitelisted IPs"""
     @wraps(f)
@@ -36,18 +183,132 @@ def require_whitelisted_ip(f):
         return f(*args, **kwargs)
     return decorated_function
 
-# Set up logging
+# Parsed YAML files: path -> ((mtime_ns, size), data)
+_YAML_CACHE = {}
+
+def load_yaml_cached(path):
+    """Parse a YAML file, reusing the last parse while its mtime and size are unchanged.
+
+    The returned data is shared between callers and must not be mutated.
+    """
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _YAML_CACHE.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    with open(path, 'r') as f:
+        data = yaml.load(f, Loader=_YamlLoader)
+    _YAML_CACHE[path] = (key, data)
+    return data
+
+def load_yaml_json_cached(path):
+    """Parse a YAML file, reusing a JSON copy in <path>.cache.json while its content is unchanged.
+
+    The cache is keyed on a hash of the file content rather than its mtime,
+    since config resets copy files with their original timestamps. Each call
+    builds fresh objects, so callers may mutate the result.
+    """
+    with open(path, 'rb') as f:
+        raw = f.read()
+    digest = hashlib.sha1(raw).hexdigest()
+    cache_path = f"{path}.cache.json"
+
+    try:
+        with open(cache_path, 'r') as f:
+            cached = json.load(f)
+        if cached['source_sha1'] == digest:
+            return cached['data']
+    except (OSError, ValueError, KeyError, TypeError):
+        pass  # Missing, stale format or corrupt cache - reparse
+
+    data = yaml.load(raw, Loader=_YamlLoader)
+    try:
+        payload = json.dumps({'source_sha1': digest, 'data': data})
+        # Only cache data that comes back from JSON unchanged (no dates, non-string keys)
+        if json.loads(payload)['data'] == data:
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(payload)
+            os.replace(tmp_path, cache_path)
+    except (TypeError, ValueError, OSError) as e:
+        logger.debug("Not caching %s: %s", path, e)
+    return data
+
+def read_json_file(path):
+    """Load a JSON file, using orjson when available"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return orjson.loads(data) if orjson else json.loads(data)
+
+def write_json_file(path, data):
+    """Write data as indented JSON, using orjson when available.
+
+    The file is replaced atomically, so readers never see a partial write.
+    """
+    if orjson:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    else:
+        payload = json.dumps(data, indent=2).encode()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+def read_log_tail(path, lines, block_size=8192):
+    """Return the last `lines` lines of a file, reading backwards from the end.
+
+    Only the blocks holding those lines are read, so the cost follows the
+    number of lines asked for rather than the size of the log. Line endings are translated the way text-mode
+    readlines() does it: '\\r\\n' and a lone '\\r' both become '\\n'.
+    """
+    with open(path, 'rb') as f:
+        pos = os.fstat(f.fileno()).st_size
+        chunks = []
+        newlines = 0
+        # One extra line break guarantees the first returned line is complete
+        while pos > 0 and newlines <= lines:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step)
+            newlines += chunk.count(b'\n') + chunk.count(b'\r') - chunk.count(b'\r\n')
+            # A '\r\n' split across this block and the later one was counted twice
+            if chunks and chunk.endswith(b'\r') and chunks[-1].startswith(b'\n'):
+                newlines -= 1
+            chunks.append(chunk)
+    text = b''.join(reversed(chunks)).decode('utf-8', errors='replace')
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    # Split on '\n' only; str.splitlines() would also break on \x0b, \x1c, ...
+    parts = text.split('\n')
+    tail = [part + '\n' for part in parts[:-1]]
+    if parts[-1]:
+        tail.append(parts[-1])
+    return ''.join(tail[-lines:])
+
+# Set up logging - records are queued and written by a listener thread so
+# request handlers never block on log file or console I/O
+_log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+_log_handlers = [
+    logging.FileHandler('textspace.log'),
+    logging.StreamHandler()
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+
+_log_queue = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, *_log_handlers)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('textspace.log'),
-        logging.StreamHandler()
-    ]
+    format='%(message)s',
+    handlers=[logging.handlers.QueueHandler(_log_queue)]
 )
 logger = logging.getLogger(__name__)
 
-@dataclass
+@dataclass(slots=True)
 class Item:
     id: str
     name: str
@@ -56,27 +317,34 @@ class Item:
     is_container: bool = False
     contents: list = None
     script: str = None
+    is_open: bool = False
+    name_lower: str = field(default=None, init=False, repr=False, compare=False)
     
     def __post_init__(self):
         if self.tags is None:
             self.tags = []
         if self.contents is None:
             self.contents = []
+        # Item names are matched case-insensitively on every item command
+        self.name_lower = self.name.lower()
 
-@dataclass
+@dataclass(slots=True)
 class Bot:
     name: str
     room_id: str
     description: str
     responses: list
     visible: bool = True
-    inventory: list = None
+    inventory: set = None
+    name_lower: str = field(default=None, init=False, repr=False, compare=False)
     
     def __post_init__(self):
-        if self.inventory is None:
-            self.inventory = []
+        # Set for O(1) membership and removal in script give/take
+        self.inventory = set(self.inventory) if self.inventory else set()
+        # Bot names are matched case-insensitively by look, examine and give
+        self.name_lower = self.name.lower()
 
-@dataclass
+@dataclass(slots=True)
 class Room:
     id: str
     name: str
@@ -84,14 +352,25 @@ class Room:
     exits: Dict[str, str]
     users: set = None
     items: list = None
+    # Name, description and exits lines; rooms are rebuilt rather than edited on reload
+    _header: str = field(default=None, init=False, repr=False, compare=False)
     
     def __post_init__(self):
         if self.users is None:
             self.users = set()
         if self.items is None:
             self.items = []
+    
+    def header(self):
+        """The fixed top of the room description: name, description and exits"""
+        if self._header is None:
+            lines = [self.name, self.description]
+            if self.exits:
+                lines.append(f"Exits: {', '.join(self.exits.keys())}")
+            self._header = "\n".join(lines)
+        return self._header
 
-@dataclass
+@dataclass(slots=True)
 class WebUser:
     name: str
     session_id: str
@@ -108,7 +387,8 @@ class TextSpaceServer:
     def __init__(self):
         self.app = Flask(__name__)
         self.app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'textspace-secret-key')
-        self.socketio = SocketIO(self.app, cors_allowed_origins="*")
+        socketio_options = {'json': _OrjsonCodec} if orjson else {}
+        self.socketio = SocketIO(self.app, cors_allowed_origins="*", **socketio_options)
         
         # Get port from Railway environment
         self.port = int(os.getenv('PORT', 8080))
@@ -117,9 +397,17 @@ class TextSpaceServer:
         self.rooms = {}
         self.items = {}
         self.bots = {}
+        self.bots_by_room = {}  # room_id -> bots currently in that room
         self.scripts = {}
         self.web_users = {}
         self.web_sessions = {}
+        self._user_records = None  # users.json contents, read on first use
+        # users.json is written off the request thread, one write at a time and in order
+        self._user_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="users-json")
+        self._user_flush_pending = False  # a users.json write is queued
+        self._user_flush_lock = threading.Lock()
+        self._user_flush_now = threading.Event()  # cuts short the queued write's delay
+        self._dirty_user_names = set()  # users saved since the last write
         self.motd = ""  # Message of the Day
         
         # MCP session management
@@ -142,8 +430,10 @@ class TextSpaceServer:
             logger.warning(f"Config manager initialization failed: {e}")
             self.config_manager = None
         
-        # Script engine
+        # Script engine - scripts run on one shared event loop thread, started on first use
         self.script_engine = ScriptEngine(self)
+        self._script_loop = None
+        self._script_loop_lock = threading.Lock()
         
         # Load data
         self.load_data()
@@ -202,51 +492,59 @@ class TextSpaceServer:
         """Load all data from YAML files"""
         try:
             # Load rooms
-            with open('rooms.yaml', 'r') as f:
-                rooms_data = yaml.safe_load(f)
-                for room_id, room_data in rooms_data['rooms'].items():
-                    self.rooms[room_id] = Room(
-                        id=room_id,
-                        name=room_data['name'],
-                        description=room_data['description'],
-                        exits=room_data.get('exits', {}),
-                        items=room_data.get('items', [])
-                    )
+            rooms_data = load_yaml_json_cached('rooms.yaml')
+            for room_id, room_data in rooms_data['rooms'].items():
+                room_id = intern_id(room_id)
+                self.rooms[room_id] = Room(
+                    id=room_id,
+                    name=room_data['name'],
+                    description=room_data['description'],
+                    exits={intern_id(str(d).lower()): intern_id(r) for d, r in room_data.get('exits', {}).items()},
+                    items=[intern_id(i) for i in room_data.get('items', [])]
+                )
             logger.info(f"Loaded {len(self.rooms)} rooms")
             
             # Load items
-            with open('items.yaml', 'r') as f:
-                items_data = yaml.safe_load(f)
-                for item_id, item_data in items_data['items'].items():
-                    self.items[item_id] = Item(
-                        id=item_id,
-                        name=item_data['name'],
-                        description=item_data['description'],
-                        tags=item_data.get('tags', []),
-                        is_container=item_data.get('is_container', False),
-                        contents=item_data.get('contents', []),
-                        script=item_data.get('script')
-                    )
+            items_data = load_yaml_json_cached('items.yaml')
+            for item_id, item_data in items_data['items'].items():
+                item_id = intern_id(item_id)
+                self.items[item_id] = Item(
+                    id=item_id,
+                    name=item_data['name'],
+                    description=item_data['description'],
+                    tags=item_data.get('tags', []),
+                    is_container=item_data.get('is_container', False),
+                    contents=[intern_id(i) for i in item_data.get('contents', [])],
+                    script=item_data.get('script')
+                )
             logger.info(f"Loaded {len(self.items)} items")
             
             # Load bots
-            with open('bots.yaml', 'r') as f:
-                bots_data = yaml.safe_load(f)
-                for bot_name, bot_data in bots_data['bots'].items():
-                    self.bots[bot_name] = Bot(
-                        name=bot_name,
-                        room_id=bot_data['room'],
-                        description=bot_data['description'],
-                        responses=bot_data.get('responses', []),
-                        visible=bot_data.get('visible', True),
-                        inventory=bot_data.get('inventory', [])
-                    )
-            logger.info(f"Loaded {len(self.bots)} bots")
+            response_templates = {}
+            bots_data = load_yaml_json_cached('bots.yaml')
+            for bot_name, bot_data in bots_data['bots'].items():
+                # Bots with identical canned dialogue share one responses list
+                responses = bot_data.get('responses', [])
+                template_key = json.dumps(responses, sort_keys=True)
+                responses = response_templates.setdefault(template_key, responses)
+
+                bot_name = intern_id(bot_name)
+                self.bots[bot_name] = Bot(
+                    name=bot_name,
+                    room_id=intern_id(bot_data['room']),
+                    description=bot_data['description'],
+                    responses=responses,
+                    visible=bot_data.get('visible', True),
+                    inventory=[intern_id(i) for i in bot_data.get('inventory', [])]
+                )
+            self.bots_by_room = {}
+            for bot in self.bots.values():
+                self.bots_by_room.setdefault(bot.room_id, []).append(bot)
+            logger.info(f"Loaded {len(self.bots)} bots ({len(response_templates)} response templates)")
             
             # Load scripts
-            with open('scripts.yaml', 'r') as f:
-                scripts_data = yaml.safe_load(f)
-                self.scripts = scripts_data.get('scripts', {})
+            scripts_data = load_yaml_json_cached('scripts.yaml')
+            self.scripts = scripts_data.get('scripts', {})
             logger.info(f"Loaded {len(self.scripts)} scripts")
             
             # Load MOTD
@@ -316,22 +614,9 @@ class TextSpaceServer:
         @require_whitelisted_ip
         def api_get_config(config_type):
             try:
-                if config_type == 'rooms':
+                if config_type in ['rooms', 'bots', 'items', 'scripts']:
                     # Read from file instead of objects
-                    with open('rooms.yaml', 'r') as f:
-                        data = yaml.safe_load(f.read())
-                    return jsonify(data)
-                elif config_type == 'bots':
-                    with open('bots.yaml', 'r') as f:
-                        data = yaml.safe_load(f.read())
-                    return jsonify(data)
-                elif config_type == 'items':
-                    with open('items.yaml', 'r') as f:
-                        data = yaml.safe_load(f.read())
-                    return jsonify(data)
-                elif config_type == 'scripts':
-                    with open('scripts.yaml', 'r') as f:
-                        data = yaml.safe_load(f.read())
+                    data = load_yaml_cached(f'{config_type}.yaml')
                     return jsonify(data)
                 else:
                     return jsonify({'error': 'Invalid config type'}), 400
@@ -408,9 +693,11 @@ class TextSpaceServer:
         def api_get_logs():
             try:
                 lines = request.args.get('lines', 50, type=int)
-                with open('textspace.log', 'r') as f:
-                    log_lines = f.readlines()
-                recent_logs = ''.join(log_lines[-lines:])
+                if lines > 0:
+                    recent_logs = read_log_tail('textspace.log', lines)
+                else:
+                    with open('textspace.log', 'r') as f:
+                        recent_logs = ''.join(f.readlines()[-lines:])
                 return jsonify({'logs': recent_logs})
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
@@ -467,45 +754,34 @@ class TextSpaceServer:
                 username = request.args.get('user', '')
                 full_text = request.args.get('text', partial)  # Full command text for context
                 
-                logger.info(f"Completions request: partial='{partial}', user='{username}', text='{full_text}'")
+                logger.debug("Completions request: partial='%s', user='%s', text='%s'", partial, username, full_text)
                 
                 completions = []
                 if username in self.web_users:
                     web_user = self.web_users[username]
-                    logger.info(f"Found user {username}, admin={web_user.admin}")
+                    logger.debug("Found user %s, admin=%s", username, web_user.admin)
                 else:
                     # Create temporary user context for completion
                     admin = username == "admin" or username == "tester-admin"
                     web_user = WebUser(name=username, session_id="", admin=admin, room_id="lobby")
-                    logger.info(f"Created temporary user context for {username}, admin={admin}")
+                    logger.debug("Created temporary user context for %s, admin=%s", username, admin)
                 
                 # Parse the full text to determine if we're completing a command or argument
                 words = full_text.strip().split()
-                logger.info(f"Parsed words: {words}, length: {len(words)}")
+                logger.debug("Parsed words: %s, length: %s", words, len(words))
                 
                 # If we have a space at the end or multiple words, we're completing arguments
                 is_argument_completion = len(words) > 1 or (full_text.endswith(' ') and len(words) >= 1)
-                logger.info(f"Is argument completion: {is_argument_completion}")
+                logger.debug("Is argument completion: %s", is_argument_completion)
                 
                 if not is_argument_completion:
                     # Completing command name
-                    logger.info("Completing command name")
+                    logger.debug("Completing command name")
                     
                     # For empty partial, show formatted help-style output
                     if not partial:
-                        # Create organized command help
-                        help_text = "Available Commands:\n\n"
-                        help_text += "  Basic:        help, version, whoami, who, motd, quit (logout)\n"
-                        help_text += "  Look:         look (l, examine, exam) [target]\n"
-                        help_text += "  Items:        get (take) <item>, drop <item>, use <item>\n"
-                        help_text += "  Complex:      put <item> [in <container>], give <item> to <target>\n"
-                        help_text += "  Interact:     open <item>, close <item>\n"
-                        help_text += "  Chat:         say <message>, whisper <target> <message>\n"
-                        help_text += "  Movement:     go (move, g) <direction>, north (n), south (s), east (e), west (w)\n"
-                        help_text += "  Inventory:    inventory (i)\n"
-                        
-                        if web_user.admin:
-                            help_text += "\n  Admin:        teleport [room], motd [message]"
+                        # Organized command help, prebuilt at import
+                        help_text = ADMIN_COMPLETION_HELP_TEXT if web_user.admin else COMPLETION_HELP_TEXT
                         
                         completions = [{
                             'name': 'help_display',
@@ -542,10 +818,10 @@ class TextSpaceServer:
                 
                 else:
                     # Completing command argument
-                    logger.info("Completing command argument")
+                    logger.debug("Completing command argument")
                     cmd_name = words[0].lower()
                     resolved_cmd = self.resolve_command(cmd_name, web_user.admin)
-                    logger.info(f"Command: {cmd_name}, resolved: {resolved_cmd}")
+                    logger.debug("Command: %s, resolved: %s", cmd_name, resolved_cmd)
                     
                     # Handle ambiguous commands
                     if resolved_cmd.startswith("AMBIGUOUS:"):
@@ -554,7 +830,7 @@ class TextSpaceServer:
                             resolved_cmd = matches[0]
                     
                     command_def = self.command_registry.get_command(resolved_cmd)
-                    logger.info(f"Command def: {command_def}, arg_types: {command_def.arg_types if command_def else None}")
+                    logger.debug("Command def: %s, arg_types: %s", command_def, command_def.arg_types if command_def else None)
                     
                     if command_def and command_def.arg_types:
                         # Special handling for complex grammar commands
@@ -570,13 +846,13 @@ class TextSpaceServer:
                                 # Completing current argument
                                 arg_index = len(words) - 2
                             
-                            logger.info(f"Argument index: {arg_index}")
+                            logger.debug("Argument index: %s", arg_index)
                             
                             if arg_index < len(command_def.arg_types):
                                 arg_type = command_def.arg_types[arg_index]
-                                logger.info(f"Argument type: {arg_type}")
+                                logger.debug("Argument type: %s", arg_type)
                                 context_items = self.get_completion_context(username, arg_type)
-                                logger.info(f"Context items: {context_items}")
+                                logger.debug("Context items: %s", context_items)
                                 
                                 # Filter context items by partial match
                                 for item in context_items:
@@ -589,7 +865,7 @@ class TextSpaceServer:
                                             'type': 'argument'
                                         })
                 
-                logger.info(f"Returning {len(completions)} completions")
+                logger.debug("Returning %s completions", len(completions))
                 return jsonify({'completions': completions})
             except Exception as e:
                 logger.error(f"Completions API error: {e}")
@@ -634,7 +910,7 @@ class TextSpaceServer:
                 if not data:
                     return jsonify({'error': 'No data provided'}), 400
                 
-                username = data.get('username', '').strip()
+                username = intern_id(data.get('username', '').strip())
                 if not username:
                     return jsonify({'error': 'Username required'}), 400
                 
@@ -652,10 +928,11 @@ class TextSpaceServer:
                 # Load user data if exists
                 user_data = self.load_user_data(username)
                 if user_data:
-                    web_user.room_id = user_data.get('room_id', 'lobby')
-                    web_user.inventory = user_data.get('inventory', [])
+                    web_user.room_id = intern_id(user_data.get('room_id', 'lobby'))
+                    web_user.inventory = list(user_data.get('inventory', []))
                 
                 # Add to web_users and sessions
+                self.release_replaced_socket(username, web_user.session_id)
                 self.web_users[username] = web_user
                 self.web_sessions[web_user.session_id] = username
                 
@@ -815,7 +1092,7 @@ class TextSpaceServer:
         
         @self.socketio.on('login')
         def handle_login(data):
-            username = data.get('username', '').strip()
+            username = intern_id(data.get('username', '').strip())
             if not username:
                 emit('login_response', {'success': False, 'message': 'Username required'})
                 return
@@ -831,9 +1108,10 @@ class TextSpaceServer:
             # Load user data
             user_data = self.load_user_data(username)
             if user_data:
-                web_user.room_id = user_data.get('room_id', 'lobby')
-                web_user.inventory = user_data.get('inventory', [])
+                web_user.room_id = intern_id(user_data.get('room_id', 'lobby'))
+                web_user.inventory = list(user_data.get('inventory', []))
             
+            self.release_replaced_socket(username, request.sid)
             self.web_users[username] = web_user
             self.web_sessions[request.sid] = username
             
@@ -842,6 +1120,7 @@ class TextSpaceServer:
                 self.rooms[web_user.room_id].users.add(username)
             
             join_room(web_user.room_id)
+            join_room(ALL_USERS_ROOM)
             
             # Notify room of player entering
             self.send_to_room(web_user.room_id, f"📥 {username} enters the room.", exclude_user=username)
@@ -888,7 +1167,7 @@ class TextSpaceServer:
             # Update stored username when user switches
             pass  # Handled by client-side JavaScript
     
-    def process_command(self, username, command):
+    def process_command(self, username: str, command: str) -> str:
         """Process user command using generalized command registry"""
         if username not in self.web_users:
             return "User not found"
@@ -955,7 +1234,7 @@ class TextSpaceServer:
                         available_items.append(self.items[item_id].name)
                         # Check if this item is an open container
                         item = self.items[item_id]
-                        if item.is_container and hasattr(item, 'is_open') and item.is_open:
+                        if item.is_container and item.is_open:
                             # Add items from open container
                             for content_id in item.contents:
                                 if content_id in self.items:
@@ -976,7 +1255,7 @@ class TextSpaceServer:
                         examinable.append(self.items[item_id].name)
                         # Check if this item is an open container
                         item = self.items[item_id]
-                        if item.is_container and hasattr(item, 'is_open') and item.is_open:
+                        if item.is_container and item.is_open:
                             # Add items from open container
                             for content_id in item.contents:
                                 if content_id in self.items:
@@ -984,10 +1263,9 @@ class TextSpaceServer:
                 # Other users in room
                 examinable.extend([user for user in room.users if user != username])
                 # Bots in room (visibility depends on user permissions)
-                for bot in self.bots.values():
-                    if bot.room_id == web_user.room_id:
-                        if bot.visible or web_user.admin:
-                            examinable.append(bot.name)
+                for bot in self.bots_by_room.get(web_user.room_id, ()):
+                    if bot.visible or web_user.admin:
+                        examinable.append(bot.name)
             # User's inventory
             examinable.extend([self.items[item_id].name for item_id in web_user.inventory if item_id in self.items])
             return examinable
@@ -1007,7 +1285,7 @@ class TextSpaceServer:
                 for item_id in room.items:
                     if item_id in self.items:
                         item = self.items[item_id]
-                        if item.is_container and hasattr(item, 'is_open') and item.is_open:
+                        if item.is_container and item.is_open:
                             open_containers.append(item.name)
             return open_containers
         
@@ -1018,10 +1296,9 @@ class TextSpaceServer:
                 # Other users in room
                 targets.extend([user for user in room.users if user != username])
                 # Visible bots in room
-                for bot in self.bots.values():
-                    if bot.room_id == web_user.room_id:
-                        if bot.visible or web_user.admin:
-                            targets.append(bot.name)
+                for bot in self.bots_by_room.get(web_user.room_id, ()):
+                    if bot.visible or web_user.admin:
+                        targets.append(bot.name)
             return targets
         
         elif arg_type == "preposition":
@@ -1220,57 +1497,60 @@ class TextSpaceServer:
             target_name = " ".join(args)
             return self.handle_examine_target(web_user, target_name)
     
+    def find_item(self, item_ids, name):
+        """Return (item_id, item) for the first of item_ids named name (case-insensitive), else (None, None)"""
+        name_lower = name.lower()
+        for item_id in item_ids:
+            item = self.items.get(item_id)
+            if item is not None and item.name_lower == name_lower:
+                return item_id, item
+        return None, None
+    
     def handle_examine_target(self, web_user, target_name):
         """Handle examining a specific target (items, users, bots)"""
         # Check inventory first
-        for item_id in web_user.inventory:
-            if item_id in self.items:
-                item = self.items[item_id]
-                if item.name.lower() == target_name.lower():
-                    # If this is a container, show contents if open
-                    description = f"{item.name}: {item.description}"
-                    if hasattr(item, 'is_container') and item.is_container:
-                        if hasattr(item, 'is_open') and item.is_open:
-                            if hasattr(item, 'contents') and item.contents:
-                                contents_names = [self.items[c_id].name for c_id in item.contents if c_id in self.items]
-                                description += f"\nContains: {', '.join(contents_names)}"
-                            else:
-                                description += "\nIt is empty and open."
-                        else:
-                            description += "\nIt is closed."
-                    return description
+        item_id, item = self.find_item(web_user.inventory, target_name)
+        if item:
+            # If this is a container, show contents if open
+            description = f"{item.name}: {item.description}"
+            if item.is_container:
+                if item.is_open:
+                    if item.contents:
+                        contents_names = [self.items[c_id].name for c_id in item.contents if c_id in self.items]
+                        description += f"\nContains: {', '.join(contents_names)}"
+                    else:
+                        description += "\nIt is empty and open."
+                else:
+                    description += "\nIt is closed."
+            return description
         
         # Check room items (including items in open containers)
         room = self.rooms.get(web_user.room_id)
         if room:
             # Check direct room items
-            for item_id in room.items:
-                if item_id in self.items:
-                    item = self.items[item_id]
-                    if item.name.lower() == target_name.lower():
-                        # If this is a container, show contents if open
-                        description = f"{item.name}: {item.description}"
-                        if hasattr(item, 'is_container') and item.is_container:
-                            if hasattr(item, 'is_open') and item.is_open:
-                                if hasattr(item, 'contents') and item.contents:
-                                    contents_names = [self.items[c_id].name for c_id in item.contents if c_id in self.items]
-                                    description += f"\nContains: {', '.join(contents_names)}"
-                                else:
-                                    description += "\nIt is empty and open."
-                            else:
-                                description += "\nIt is closed."
-                        return description
+            item_id, item = self.find_item(room.items, target_name)
+            if item:
+                # If this is a container, show contents if open
+                description = f"{item.name}: {item.description}"
+                if item.is_container:
+                    if item.is_open:
+                        if item.contents:
+                            contents_names = [self.items[c_id].name for c_id in item.contents if c_id in self.items]
+                            description += f"\nContains: {', '.join(contents_names)}"
+                        else:
+                            description += "\nIt is empty and open."
+                    else:
+                        description += "\nIt is closed."
+                return description
             
             # Check items in open containers
             for item_id in room.items:
                 if item_id in self.items:
                     container = self.items[item_id]
-                    if container.is_container and hasattr(container, 'is_open') and container.is_open:
-                        for content_id in container.contents:
-                            if content_id in self.items:
-                                item = self.items[content_id]
-                                if item.name.lower() == target_name.lower():
-                                    return f"{item.name}: {item.description}"
+                    if container.is_container and container.is_open:
+                        content_id, item = self.find_item(container.contents, target_name)
+                        if item:
+                            return f"{item.name}: {item.description}"
             
             # Check other users in room
             for user_name in room.users:
@@ -1282,13 +1562,13 @@ class TextSpaceServer:
                     return f"{user_name}: Another visitor to this place."
             
             # Check bots in room (visibility depends on user permissions)
-            for bot in self.bots.values():
-                if bot.room_id == web_user.room_id:
-                    if bot.name.lower() == target_name.lower():
-                        # Regular users can only examine visible bots, admins can examine all
-                        if bot.visible or web_user.admin:
-                            visibility_note = " (invisible)" if not bot.visible else ""
-                            return f"{bot.name}{visibility_note}: {bot.description}"
+            target_lower = target_name.lower()
+            for bot in self.bots_by_room.get(web_user.room_id, ()):
+                if bot.name_lower == target_lower:
+                    # Regular users can only examine visible bots, admins can examine all
+                    if bot.visible or web_user.admin:
+                        visibility_note = " (invisible)" if not bot.visible else ""
+                        return f"{bot.name}{visibility_note}: {bot.description}"
         
         return f"You don't see '{target_name}' here."
     
@@ -1363,7 +1643,7 @@ class TextSpaceServer:
         return self.handle_kick_user(web_user, target_user)
     
     def handle_switchuser_cmd(self, web_user, args):
-        new_username = args[0]
+        new_username = intern_id(args[0])
         result = self.handle_switch_user(web_user, new_username)
         emit('user_switched', {'username': new_username})
         return result
@@ -1446,13 +1726,7 @@ class TextSpaceServer:
     def handle_put_in_container(self, web_user, item_name, container_name):
         """Handle putting an item into a container"""
         # Find item in inventory
-        item_id = None
-        for inv_item_id in web_user.inventory:
-            if inv_item_id in self.items:
-                item = self.items[inv_item_id]
-                if item.name.lower() == item_name.lower():
-                    item_id = inv_item_id
-                    break
+        item_id, item = self.find_item(web_user.inventory, item_name)
         
         if not item_id:
             return f"You don't have '{item_name}'."
@@ -1462,17 +1736,12 @@ class TextSpaceServer:
         if not room:
             return "You are in an unknown location."
         
-        container_id = None
-        for room_item_id in room.items:
-            if room_item_id in self.items:
-                container = self.items[room_item_id]
-                if container.name.lower() == container_name.lower():
-                    if not container.is_container:
-                        return f"You can't put things in {container.name}."
-                    if not (hasattr(container, 'is_open') and container.is_open):
-                        return f"The {container.name} is closed."
-                    container_id = room_item_id
-                    break
+        container_id, container = self.find_item(room.items, container_name)
+        if container_id:
+            if not container.is_container:
+                return f"You can't put things in {container.name}."
+            if not container.is_open:
+                return f"The {container.name} is closed."
         
         if not container_id:
             return f"You don't see '{container_name}' here."
@@ -1490,13 +1759,7 @@ class TextSpaceServer:
     def handle_give_to_target(self, web_user, item_name, target_name):
         """Handle giving an item to a target"""
         # Find item in inventory
-        item_id = None
-        for inv_item_id in web_user.inventory:
-            if inv_item_id in self.items:
-                item = self.items[inv_item_id]
-                if item.name.lower() == item_name.lower():
-                    item_id = inv_item_id
-                    break
+        item_id, item = self.find_item(web_user.inventory, item_name)
         
         if not item_id:
             return f"You don't have '{item_name}'."
@@ -1516,18 +1779,17 @@ class TextSpaceServer:
                     self.save_user_data(web_user)
                     self.save_user_data(target_user)
                     
-                    item = self.items[item_id]
                     self.send_to_room(web_user.room_id, f"{web_user.name} gives {item.name} to {user_name}.")
                     return f"You give {item.name} to {user_name}."
                 else:
                     return f"{user_name} is not available to receive items."
         
         # Check for bot target
-        for bot in self.bots.values():
-            if bot.room_id == web_user.room_id and bot.name.lower() == target_name.lower():
+        target_lower = target_name.lower()
+        for bot in self.bots_by_room.get(web_user.room_id, ()):
+            if bot.name_lower == target_lower:
                 if bot.visible or web_user.admin:
                     # For now, bots just acknowledge the gift but don't keep it
-                    item = self.items[item_id]
                     self.send_to_room(web_user.room_id, f"{web_user.name} offers {item.name} to {bot.name}.")
                     self.send_to_room(web_user.room_id, f"{bot.name} says: 'Thank you, but I cannot accept gifts right now.'")
                     return f"You offer {item.name} to {bot.name}, but they politely decline."
@@ -1553,82 +1815,19 @@ class TextSpaceServer:
     
     def resolve_command(self, cmd, is_admin):
         """Resolve command using most-significant match"""
-        # Define all available commands
-        basic_commands = [
-            'help', 'version', 'whoami', 'look', 'who', 'inventory', 'say', 'whisper',
-            'get', 'take', 'drop', 'examine', 'exam', 'use', 'go', 'move',
-            'north', 'south', 'east', 'west'
-        ]
-        
-        admin_commands = ['teleport', 'broadcast', 'kick', 'switchuser', 'script']
-        
-        # Single-letter aliases (exact matches only)
-        aliases = {
-            'n': 'north', 's': 'south', 'e': 'east', 'w': 'west',
-            'l': 'look', 'g': 'go', 'i': 'inventory', 'h': 'help', 'v': 'version'
-        }
-        
-        # Check exact alias match first (only for single letters)
-        if len(cmd) == 1 and cmd in aliases:
-            return aliases[cmd]
-        
-        # Build command list based on user privileges
-        all_commands = basic_commands[:]
-        if is_admin:
-            all_commands.extend(admin_commands)
-        
-        # Find exact match
-        if cmd in all_commands:
-            return cmd
-        
-        # Find partial matches
-        matches = [c for c in all_commands if c.startswith(cmd)]
-        
-        if len(matches) == 1:
-            return matches[0]
-        elif len(matches) > 1:
-            return f"AMBIGUOUS:{','.join(matches)}"
-        else:
-            return cmd  # Return original if no matches
+        return resolve_command_name(cmd, bool(is_admin))
     
     def get_help_text(self, is_admin):
         """Get help text for user"""
-        help_text = """
-Available commands:
-  look (l) - See room description and contents
-  go <exit> (g) - Move to another room (or just type the exit name)
-  north/south/east/west (n/s/e/w) - Move in cardinal directions
-  say <message> (") - Speak to everyone in the room
-  whisper <user> <message> - Send private message to user
-  who - List all online users
-  whoami - Show your username and admin status
-  inventory (i) - Show your items
-  get <item> - Pick up an item
-  drop <item> - Drop an item
-  put <item> [in <container>] - Put item down or in container
-  give <item> to <target> - Give item to user or bot
-  examine <item> - Look at an item closely
-  use <item> - Use an item
-  open <item> - Open a container
-  close <item> - Close a container
-  motd - View message of the day
-  quit (logout) - Log out and return to login screen
-  help (h) - Show this help
-  version (v) - Show server version
-"""
-        
-        if is_admin:
-            help_text += """
-Admin commands:
-  teleport [room] - Jump to room (no args lists rooms)
-  broadcast <message> - Send message to all users
-  kick <user> - Disconnect a user
-  switchuser <name> - Switch to different user
-  script <name> - Execute a bot script
-  motd [message] - View or set message of the day
-"""
-        
-        return help_text.strip()
+        return ADMIN_HELP_TEXT if is_admin else HELP_TEXT
+    
+    def move_bot(self, bot, room_id):
+        """Move a bot to another room, keeping bots_by_room in step"""
+        old_bots = self.bots_by_room.get(bot.room_id)
+        if old_bots and bot in old_bots:
+            old_bots.remove(bot)
+        bot.room_id = room_id
+        self.bots_by_room.setdefault(room_id, []).append(bot)
     
     def get_room_description(self, room_id, username):
         """Get room description"""
@@ -1636,20 +1835,15 @@ Admin commands:
         if not room:
             return "You are in an unknown location."
         
-        lines = []
-        lines.append(room.name)
-        lines.append(room.description)
-        
-        if room.exits:
-            exits = ", ".join(room.exits.keys())
-            lines.append(f"Exits: {exits}")
+        lines = [room.header()]
         
         # Check if user is admin
         is_admin = username in self.web_users and self.web_users[username].admin
         
         other_users = [u for u in room.users if u != username]
-        visible_bots = [bot for bot in self.bots.values() if bot.room_id == room_id and bot.visible]
-        invisible_bots = [bot for bot in self.bots.values() if bot.room_id == room_id and not bot.visible]
+        room_bots = self.bots_by_room.get(room_id, ())
+        visible_bots = [bot for bot in room_bots if bot.visible]
+        invisible_bots = [bot for bot in room_bots if not bot.visible]
         
         if is_admin:
             # Admin view: separate lists
@@ -1720,26 +1914,20 @@ Admin commands:
         if not current_room:
             return "You are in an unknown location."
         
-        # Find matching exits (exact match first, then partial)
-        matching_exits = []
-        exact_match = None
-        
-        for exit_name in current_room.exits:
-            if exit_name == direction:
-                exact_match = exit_name
-                break
-            elif exit_name.startswith(direction):
-                matching_exits.append(exit_name)
-        
-        # Use exact match if found
-        if exact_match:
-            target_exit = exact_match
-        elif len(matching_exits) == 1:
-            target_exit = matching_exits[0]
-        elif len(matching_exits) > 1:
-            return f"Ambiguous direction '{direction}'. Options: {', '.join(matching_exits)}"
+        # Exit names are lowercased at load, so matching ignores case
+        exit_key = direction.lower()
+        
+        # Use exact match if found, otherwise match on prefix
+        if exit_key in current_room.exits:
+            target_exit = exit_key
         else:
-            return f"You can't go {direction} from here."
+            matching_exits = [exit_name for exit_name in current_room.exits if exit_name.startswith(exit_key)]
+            if len(matching_exits) == 1:
+                target_exit = matching_exits[0]
+            elif len(matching_exits) > 1:
+                return f"Ambiguous direction '{direction}'. Options: {', '.join(matching_exits)}"
+            else:
+                return f"You can't go {direction} from here."
         
         target_room_id = current_room.exits[target_exit]
         if target_room_id not in self.rooms:
@@ -1747,8 +1935,10 @@ Admin commands:
         
         # Move user
         current_room.users.discard(web_user.name)
+        self.leave_socket_room(web_user)
         web_user.room_id = target_room_id
         self.rooms[target_room_id].users.add(web_user.name)
+        self.join_socket_room(web_user)
         
         # Notify rooms of player movement
         self.send_to_room(current_room.id, f"📤 {web_user.name} leaves the room.", exclude_user=web_user.name)
@@ -1770,6 +1960,7 @@ Admin commands:
             # Remove from room
             if web_user.room_id in self.rooms:
                 self.rooms[web_user.room_id].users.discard(target_username)
+            self.leave_socket_room(web_user)
             
             # Remove from users dict
             del self.web_users[target_username]
@@ -1793,6 +1984,7 @@ Admin commands:
         # Remove from current room
         if web_user.room_id in self.rooms:
             self.rooms[web_user.room_id].users.discard(web_user.name)
+        self.leave_socket_room(web_user)
         
         # Remove from users dict
         if web_user.name in self.web_users:
@@ -1810,16 +2002,18 @@ Admin commands:
         # Load user data
         user_data = self.load_user_data(new_username)
         if user_data:
-            new_web_user.room_id = user_data.get('room_id', 'lobby')
-            new_web_user.inventory = user_data.get('inventory', [])
+            new_web_user.room_id = intern_id(user_data.get('room_id', 'lobby'))
+            new_web_user.inventory = list(user_data.get('inventory', []))
         
         # Update session
+        self.release_replaced_socket(new_username, new_web_user.session_id)
         self.web_users[new_username] = new_web_user
         self.web_sessions[web_user.session_id] = new_username
         
         # Add to room
         if new_web_user.room_id in self.rooms:
             self.rooms[new_web_user.room_id].users.add(new_username)
+        self.join_socket_room(new_web_user)
         
         # Notify room of player entering
         self.send_to_room(new_web_user.room_id, f"📥 {new_username} enters the room.", exclude_user=new_username)
@@ -1842,29 +2036,35 @@ Admin commands:
             return f"Bot '{bot_name}' not found for script '{script_name}'"
         
         try:
-            # Execute the script in the background using socketio's background task
-            self.socketio.start_background_task(
-                self._execute_script_background, 
-                script_content, 
-                bot_name
-            )
+            # Execute the script in the background on the script event loop
+            self._execute_script_background(script_content, bot_name)
             return f"Executing script '{script_name}' for bot '{bot_name}'"
         except Exception as e:
             logger.error(f"Script execution error: {e}")
             return f"Error executing script '{script_name}': {str(e)}"
     
+    def _get_script_loop(self):
+        """Return the event loop that runs bot scripts, starting its thread if needed"""
+        with self._script_loop_lock:
+            if self._script_loop is None:
+                loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="script-loop", daemon=True).start()
+                self._script_loop = loop
+        return self._script_loop
+    
     def _execute_script_background(self, script_content, bot_name):
-        """Background task for script execution"""
-        try:
-            import asyncio
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(
-                self.script_engine.execute_script(script_content, bot_name)
-            )
-            loop.close()
-        except Exception as e:
-            logger.error(f"Background script execution error: {e}")
+        """Schedule a script on the shared script loop and return its future"""
+        future = asyncio.run_coroutine_threadsafe(
+            self.script_engine.execute_script(script_content, bot_name),
+            self._get_script_loop()
+        )
+        future.add_done_callback(self._log_script_error)
+        return future
+    
+    def _log_script_error(self, future):
+        """Log a script that finished with an exception"""
+        if not future.cancelled() and future.exception():
+            logger.error(f"Background script execution error: {future.exception()}")
     
     def handle_teleport(self, web_user, room_id):
         """Handle teleport command"""
@@ -1874,10 +2074,12 @@ Admin commands:
         # Remove from current room
         if web_user.room_id in self.rooms:
             self.rooms[web_user.room_id].users.discard(web_user.name)
+        self.leave_socket_room(web_user)
         
         # Move to new room
         web_user.room_id = room_id
         self.rooms[room_id].users.add(web_user.name)
+        self.join_socket_room(web_user)
         
         # Save user data
         self.save_user_data(web_user)
@@ -1900,29 +2102,21 @@ Admin commands:
         for room_item_id in room.items:
             if room_item_id in self.items:
                 container = self.items[room_item_id]
-                if container.is_container and hasattr(container, 'is_open') and container.is_open:
-                    for content_id in container.contents:
-                        if content_id in self.items:
-                            item = self.items[content_id]
-                            if item.name.lower() == item_name.lower():
-                                # Move item from container to inventory
-                                container.contents.remove(content_id)
-                                web_user.inventory.append(content_id)
-                                self.save_user_data(web_user)
-                                self.send_to_room(web_user.room_id, f"{web_user.name} takes {item.name} from {container.name}.", exclude_user=web_user.name)
-                                return f"You take {item.name} from {container.name}."
+                if container.is_container and container.is_open:
+                    content_id, item = self.find_item(container.contents, item_name)
+                    if item:
+                        # Move item from container to inventory
+                        container.contents.remove(content_id)
+                        web_user.inventory.append(content_id)
+                        self.save_user_data(web_user)
+                        self.send_to_room(web_user.room_id, f"{web_user.name} takes {item.name} from {container.name}.", exclude_user=web_user.name)
+                        return f"You take {item.name} from {container.name}."
         
         # Find item in room
-        item_id = None
-        for room_item_id in room.items:
-            if room_item_id in self.items:
-                item = self.items[room_item_id]
-                if item.name.lower() == item_name.lower():
-                    # Check if item is immovable
-                    if "immovable" in item.tags:
-                        return f"The {item.name} is too heavy to move."
-                    item_id = room_item_id
-                    break
+        item_id, item = self.find_item(room.items, item_name)
+        # Check if item is immovable
+        if item and "immovable" in item.tags:
+            return f"The {item.name} is too heavy to move."
         
         if not item_id:
             return f"There is no '{item_name}' here."
@@ -1943,13 +2137,7 @@ Admin commands:
     def handle_drop_item(self, web_user, item_name):
         """Handle dropping an item"""
         # Find item in inventory
-        item_id = None
-        for inv_item_id in web_user.inventory:
-            if inv_item_id in self.items:
-                item = self.items[inv_item_id]
-                if item.name.lower() == item_name.lower():
-                    item_id = inv_item_id
-                    break
+        item_id, item = self.find_item(web_user.inventory, item_name)
         
         if not item_id:
             return f"You don't have '{item_name}'."
@@ -1964,7 +2152,6 @@ Admin commands:
         self.save_user_data(web_user)
         
         # Notify room
-        item = self.items[item_id]
         self.send_to_room(web_user.room_id, f"{web_user.name} drops {item.name}.", exclude_user=web_user.name)
         
         return f"You drop {item.name}."
@@ -1972,20 +2159,16 @@ Admin commands:
     def handle_examine_item(self, web_user, item_name):
         """Handle examining an item, user, or bot"""
         # Check inventory first
-        for item_id in web_user.inventory:
-            if item_id in self.items:
-                item = self.items[item_id]
-                if item.name.lower() == item_name.lower():
-                    return f"{item.name}: {item.description}"
+        item_id, item = self.find_item(web_user.inventory, item_name)
+        if item:
+            return f"{item.name}: {item.description}"
         
         # Check room items
         room = self.rooms.get(web_user.room_id)
         if room:
-            for item_id in room.items:
-                if item_id in self.items:
-                    item = self.items[item_id]
-                    if item.name.lower() == item_name.lower():
-                        return f"{item.name}: {item.description}"
+            item_id, item = self.find_item(room.items, item_name)
+            if item:
+                return f"{item.name}: {item.description}"
             
             # Check other users in room
             for user_name in room.users:
@@ -1997,37 +2180,29 @@ Admin commands:
                     return f"{user_name}: Another visitor to this place."
             
             # Check bots in room (visibility depends on user permissions)
-            for bot in self.bots.values():
-                if bot.room_id == web_user.room_id:
-                    if bot.name.lower() == item_name.lower():
-                        # Regular users can only examine visible bots, admins can examine all
-                        if bot.visible or web_user.admin:
-                            visibility_note = " (invisible)" if not bot.visible else ""
-                            return f"{bot.name}{visibility_note}: {bot.description}"
+            item_lower = item_name.lower()
+            for bot in self.bots_by_room.get(web_user.room_id, ()):
+                if bot.name_lower == item_lower:
+                    # Regular users can only examine visible bots, admins can examine all
+                    if bot.visible or web_user.admin:
+                        visibility_note = " (invisible)" if not bot.visible else ""
+                        return f"{bot.name}{visibility_note}: {bot.description}"
         
         return f"You don't see '{item_name}' here."
     
     def handle_use_item(self, web_user, item_name):
         """Handle using an item"""
         # Find item in inventory
-        for item_id in web_user.inventory:
-            if item_id in self.items:
-                item = self.items[item_id]
-                if item.name.lower() == item_name.lower():
-                    if item.script:
-                        # Execute item script
-                        try:
-                            result = self.script_engine.execute_script(item.script, {
-                                'user': web_user.name,
-                                'room': web_user.room_id,
-                                'item': item_id
-                            })
-                            return result if result else f"You use {item.name}."
-                        except Exception as e:
-                            logger.error(f"Script error: {e}")
-                            return f"You use {item.name}."
-                    else:
-                        return f"You use {item.name}."
+        item_id, item = self.find_item(web_user.inventory, item_name)
+        if item:
+            if item.script:
+                # Run the item script on the script loop; its output
+                # reaches the room as the script says things
+                try:
+                    self._execute_script_background(item.script, f"item_{item_id}")
+                except Exception as e:
+                    logger.error(f"Script error: {e}")
+            return f"You use {item.name}."
         
         return f"You don't have '{item_name}'."
 
@@ -2038,26 +2213,24 @@ Admin commands:
             return "You are in an unknown location."
         
         # Find container in room
-        for item_id in room.items:
-            if item_id in self.items:
-                item = self.items[item_id]
-                if item.name.lower() == item_name.lower():
-                    if not item.is_container:
-                        return f"You can't open {item.name}."
-                    
-                    if hasattr(item, 'is_open') and item.is_open:
-                        return f"The {item.name} is already open."
-                    
-                    # Open the container
-                    item.is_open = True
-                    self.send_to_room(web_user.room_id, f"{web_user.name} opens {item.name}.", exclude_user=web_user.name)
-                    
-                    # Show contents
-                    if item.contents:
-                        contents = [self.items[content_id].name for content_id in item.contents if content_id in self.items]
-                        return f"You open {item.name}. Inside you see: {', '.join(contents)}."
-                    else:
-                        return f"You open {item.name}. It is empty."
+        item_id, item = self.find_item(room.items, item_name)
+        if item:
+            if not item.is_container:
+                return f"You can't open {item.name}."
+            
+            if item.is_open:
+                return f"The {item.name} is already open."
+            
+            # Open the container
+            item.is_open = True
+            self.send_to_room(web_user.room_id, f"{web_user.name} opens {item.name}.", exclude_user=web_user.name)
+            
+            # Show contents
+            if item.contents:
+                contents = [self.items[content_id].name for content_id in item.contents if content_id in self.items]
+                return f"You open {item.name}. Inside you see: {', '.join(contents)}."
+            else:
+                return f"You open {item.name}. It is empty."
         
         return f"You don't see '{item_name}' here."
     
@@ -2068,20 +2241,18 @@ Admin commands:
             return "You are in an unknown location."
         
         # Find container in room
-        for item_id in room.items:
-            if item_id in self.items:
-                item = self.items[item_id]
-                if item.name.lower() == item_name.lower():
-                    if not item.is_container:
-                        return f"You can't close {item.name}."
-                    
-                    if not hasattr(item, 'is_open') or not item.is_open:
-                        return f"The {item.name} is already closed."
-                    
-                    # Close the container
-                    item.is_open = False
-                    self.send_to_room(web_user.room_id, f"{web_user.name} closes {item.name}.", exclude_user=web_user.name)
-                    return f"You close {item.name}."
+        item_id, item = self.find_item(room.items, item_name)
+        if item:
+            if not item.is_container:
+                return f"You can't close {item.name}."
+            
+            if not item.is_open:
+                return f"The {item.name} is already closed."
+            
+            # Close the container
+            item.is_open = False
+            self.send_to_room(web_user.room_id, f"{web_user.name} closes {item.name}.", exclude_user=web_user.name)
+            return f"You close {item.name}."
         
         return f"You don't see '{item_name}' here."
 
@@ -2090,21 +2261,38 @@ Admin commands:
         if room_id not in self.rooms:
             return
         
-        for username in self.rooms[room_id].users:
-            if username != exclude_user and username in self.web_users:
-                web_user = self.web_users[username]
-                try:
-                    # Try to emit via SocketIO (for web users)
-                    emit('message', {'text': message}, room=web_user.session_id)
-                except RuntimeError:
-                    # No SocketIO context (e.g., MCP API calls) - skip notification
-                    pass
+        # Connected sockets are kept in the Socket.IO room for their game room,
+        # so one emit reaches everyone there (MCP sessions have no socket)
+        excluded = self.web_users.get(exclude_user) if exclude_user else None
+        self.socketio.emit('message', {'text': message}, to=room_id,
+                           skip_sid=excluded.session_id if excluded else None)
+    
+    def join_socket_room(self, web_user):
+        """Add the user's socket to the Socket.IO room for their current game room"""
+        # MCP and test sessions have no live socket to move
+        if self.socketio.server.manager.is_connected(web_user.session_id, '/'):
+            self.socketio.server.enter_room(web_user.session_id, web_user.room_id, namespace='/')
+    
+    def leave_socket_room(self, web_user):
+        """Remove the user's socket from the Socket.IO room for their current game room"""
+        if self.socketio.server.manager.is_connected(web_user.session_id, '/'):
+            self.socketio.server.leave_room(web_user.session_id, web_user.room_id, namespace='/')
+    
+    def release_replaced_socket(self, username, session_id):
+        """Stop room and broadcast messages reaching the socket a name is logging in over"""
+        old_user = self.web_users.get(username)
+        if old_user and old_user.session_id != session_id:
+            self.leave_socket_room(old_user)
+            if self.socketio.server.manager.is_connected(old_user.session_id, '/'):
+                self.socketio.server.leave_room(old_user.session_id, ALL_USERS_ROOM, namespace='/')
     
     def send_to_all(self, message, exclude_user=None):
         """Send message to all users"""
-        for username, web_user in self.web_users.items():
-            if username != exclude_user:
-                emit('message', {'text': message}, room=web_user.session_id)
+        # Every logged-in socket joins ALL_USERS_ROOM at login, so one emit
+        # reaches them all; sockets still at the login prompt are not in it
+        excluded = self.web_users.get(exclude_user) if exclude_user else None
+        self.socketio.emit('message', {'text': message}, to=ALL_USERS_ROOM,
+                           skip_sid=excluded.session_id if excluded else None)
     
     def handle_user_disconnect(self, username, session_id):
         """Handle user disconnect"""
@@ -2115,9 +2303,11 @@ Admin commands:
             if web_user.room_id in self.rooms:
                 self.send_to_room(web_user.room_id, f"📤 {username} leaves the room.", exclude_user=username)
                 self.rooms[web_user.room_id].users.discard(username)
+            self.leave_socket_room(web_user)
             
-            # Save user data
+            # Save user data, writing it out now rather than after the save delay
             self.save_user_data(web_user)
+            self.flush_user_data()
             
             # Remove from active users
             del self.web_users[username]
@@ -2127,14 +2317,19 @@ Admin commands:
         
         logger.info(f"User '{username}' disconnected")
     
+    def _get_user_records(self):
+        """Return the saved user records, reading users.json only the first time"""
+        if self._user_records is None:
+            try:
+                self._user_records = read_json_file('users.json')
+            except FileNotFoundError:
+                self._user_records = {}
+        return self._user_records
+    
     def load_user_data(self, username):
         """Load user data from file"""
         try:
-            with open('users.json', 'r') as f:
-                users_data = json.load(f)
-                return users_data.get(username)
-        except FileNotFoundError:
-            return None
+            return self._get_user_records().get(username)
         except Exception as e:
             logger.error(f"Error loading user data: {e}")
             return None
@@ -2142,28 +2337,57 @@ Admin commands:
     def save_user_data(self, web_user):
         """Save user data to file"""
         try:
-            # Load existing data
-            try:
-                with open('users.json', 'r') as f:
-                    users_data = json.load(f)
-            except FileNotFoundError:
-                users_data = {}
-            
-            # Update user data
+            # Update the in-memory records; users.json is only re-read at startup
+            users_data = self._get_user_records()
             users_data[web_user.name] = {
                 'room_id': web_user.room_id,
-                'inventory': web_user.inventory,
+                'inventory': list(web_user.inventory),
                 'admin': web_user.admin,
                 'last_seen': datetime.now().isoformat()
             }
             
-            # Save data
-            with open('users.json', 'w') as f:
-                json.dump(users_data, f, indent=2)
+            # Queue one delayed write; saves arriving meanwhile ride along with it
+            with self._user_flush_lock:
+                self._dirty_user_names.add(web_user.name)
+                if len(self._dirty_user_names) >= USER_SAVE_BATCH:
+                    self._user_flush_now.set()
+                if self._user_flush_pending:
+                    return
+                self._user_flush_pending = True
+            future = self._user_writer.submit(self._write_user_records, USER_SAVE_DELAY)
+            future.add_done_callback(self._log_user_write_error)
                 
         except Exception as e:
             logger.error(f"Error saving user data: {e}")
     
+    def flush_user_data(self):
+        """Write users.json now, without waiting out the save delay"""
+        with self._user_flush_lock:
+            self._user_flush_now.set()
+            if self._user_flush_pending:
+                return
+            self._user_flush_pending = True
+        future = self._user_writer.submit(self._write_user_records)
+        future.add_done_callback(self._log_user_write_error)
+    
+    def _write_user_records(self, delay=0):
+        """Write users.json on the writer thread, after waiting up to delay seconds"""
+        if delay:
+            self._user_flush_now.wait(delay)
+        with self._user_flush_lock:
+            self._user_flush_pending = False
+            self._user_flush_now.clear()
+            self._dirty_user_names.clear()
+            # Records are replaced rather than mutated, so a shallow copy is a
+            # stable snapshot of everything saved so far
+            snapshot = dict(self._get_user_records())
+        write_json_file('users.json', snapshot)
+    
+    def _log_user_write_error(self, future):
+        """Log a failed background users.json write"""
+        if future.exception():
+            logger.error(f"Error saving user data: {future.exception()}")
+    
     def run(self):
         """Start the web server"""
         host = os.getenv('HOST', '0.0.0.0')
@@ -2172,7 +2396,16 @@ Admin commands:
         logger.info(f"Starting {SERVER_NAME} v{VERSION}")
         logger.info(f"Web server starting on {host}:{port}")
         
-        self.socketio.run(self.app, host=host, port=port, debug=False, allow_unsafe_werkzeug=True)
+        # Railway stops the container with SIGTERM; exit normally so the
+        # finally block below still writes out pending user saves
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        
+        try:
+            self.socketio.run(self.app, host=host, port=port, debug=False, allow_unsafe_werkzeug=True)
+        finally:
+            # Don't lose saves still waiting out USER_SAVE_DELAY
+            self.flush_user_data()
+            self._user_writer.shutdown(wait=True)
 
 if __name__ == "__main__":
     server = TextSpaceServer()
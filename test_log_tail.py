@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Test read_log_tail against reading the whole log with readlines()"""
+
+import os
+import random
+import tempfile
+import time
+
+from server_web_only import read_log_tail
+
+
+def expected_tail(path, lines):
+    """What /api/logs returned before read_log_tail: text-mode readlines()"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return ''.join(f.readlines()[-lines:])
+
+
+def check(path, content, lines, block_size):
+    with open(path, 'wb') as f:
+        f.write(content)
+    expected = expected_tail(path, lines)
+    actual = read_log_tail(path, lines, block_size=block_size)
+    assert actual == expected, f"{content!r} lines={lines} block={block_size}: {actual!r} != {expected!r}"
+
+
+def test_log_tail_matches_readlines():
+    """LF, CRLF and lone CR endings, with and without a trailing newline"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'textspace.log')
+        cases = [
+            b'',
+            b'one line',
+            b'a\nb\nc\n',
+            b'a\nb\nc',
+            b'a\r\nb\r\nc\r\n',
+            b'a\rb\rc',
+            b'\n\n\n',
+            b'\r\n\r\n',
+            b'mixed\r\nendings\rhere\nand\r\r\nmore',
+            'café – log\r\nüber\n'.encode('utf-8'),
+        ]
+        for content in cases:
+            for lines in (1, 2, 3, 10):
+                for block_size in (1, 2, 3, 8192):
+                    check(path, content, lines, block_size)
+    print("✓ Fixed cases match readlines()")
+
+
+def test_log_tail_fuzz():
+    """Random logs built from line-ending-heavy fragments, read in small blocks"""
+    rng = random.Random(1234)
+    fragments = [b'a', b'bc', b'\n', b'\r', b'\r\n', b'INFO - x', b' ']
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'textspace.log')
+        for _ in range(3000):
+            content = b''.join(rng.choice(fragments) for _ in range(rng.randint(0, 40)))
+            check(path, content, rng.randint(1, 8), rng.randint(1, 7))
+    print("✓ 3000 random logs match readlines()")
+
+
+def test_log_tail_large_request_is_linear():
+    """Asking for most or all of a big log reads it once, not block by block again"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'textspace.log')
+        with open(path, 'wb') as f:
+            for i in range(200000):
+                f.write(f"2026-01-01 00:00:00 - INFO - log line {i}\r\n".encode())
+        for lines in (100000, 10**9):
+            start = time.perf_counter()
+            actual = read_log_tail(path, lines)
+            elapsed = time.perf_counter() - start
+            assert actual == expected_tail(path, lines), f"lines={lines}"
+            # Re-reading everything on each block takes tens of seconds here
+            assert elapsed < 3, f"lines={lines} took {elapsed:.1f}s"
+    print("✓ Large tails of an ~8MB log are read in linear time")
+
+
+if __name__ == '__main__':
+    test_log_tail_matches_readlines()
+    test_log_tail_fuzz()
+    test_log_tail_large_request_is_linear()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Test that a socket replaced by a new login stops getting room and broadcast messages"""
+
+import os
+import tempfile
+
+from server_web_only import TextSpaceServer
+
+
+def received_texts(client):
+    texts = []
+    for packet in client.get_received():
+        if packet['name'] == 'message':
+            # Server-side emits arrive as a dict, handler replies as a one-item list
+            args = packet['args'][0] if isinstance(packet['args'], list) else packet['args']
+            texts.append(args['text'])
+    return texts
+
+
+def run_in_temp_dir(test):
+    """Build a server from the repo configs, then keep users.json in a temp dir"""
+    server = TextSpaceServer()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            test(server)
+        finally:
+            server._user_writer.shutdown(wait=True)
+            os.chdir(cwd)
+
+
+def test_relogin_releases_old_socket():
+    def test(server):
+        old_alice = server.socketio.test_client(server.app)
+        old_alice.emit('login', {'username': 'alice'})
+        new_alice = server.socketio.test_client(server.app)
+        new_alice.emit('login', {'username': 'alice'})
+        admin = server.socketio.test_client(server.app)
+        admin.emit('login', {'username': 'admin'})
+        for client in (old_alice, new_alice, admin):
+            client.get_received()
+
+        # Room chat reaches only the current session
+        server.process_command('admin', 'say secret')
+        assert received_texts(old_alice) == []
+        assert received_texts(new_alice) == ['admin says: secret']
+
+        # So do broadcasts
+        server.process_command('admin', 'broadcast hello everyone')
+        assert received_texts(old_alice) == []
+        assert received_texts(new_alice) == ['📢 admin broadcasts: hello everyone']
+
+        # And the old socket doesn't follow the old room once alice has left it
+        server.process_command('alice', 'go north')
+        new_alice.get_received()
+        server.process_command('admin', 'say still here?')
+        assert received_texts(old_alice) == []
+    run_in_temp_dir(test)
+    print("✓ Logging in again moves messages to the new socket only")
+
+
+def test_switchuser_to_online_name_releases_old_socket():
+    def test(server):
+        bob = server.socketio.test_client(server.app)
+        bob.emit('login', {'username': 'bob'})
+        admin = server.socketio.test_client(server.app)
+        admin.emit('login', {'username': 'admin'})
+        bob.get_received()
+
+        server.process_command('admin', 'switchuser bob')
+        server.process_command('bob', 'say from the admin socket')
+        assert received_texts(bob) == []
+    run_in_temp_dir(test)
+    print("✓ switchuser to an online name releases that name's old socket")
+
+
+if __name__ == '__main__':
+    test_relogin_releases_old_socket()
+    test_switchuser_to_online_name_releases_old_socket()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Test that user saves are coalesced into few users.json writes"""
+
+import json
+import os
+import tempfile
+import threading
+
+import server_web_only
+from server_web_only import TextSpaceServer, WebUser, USER_SAVE_BATCH, USER_SAVE_DELAY
+
+
+class WriteCounter:
+    """Stand-in for write_json_file that records each users.json write"""
+
+    def __init__(self, write):
+        self.write = write
+        self.snapshots = []
+        self.written = threading.Event()
+
+    def __call__(self, path, data):
+        self.write(path, data)
+        self.snapshots.append(data)
+        self.written.set()
+
+
+def run_in_temp_dir(test):
+    """Build a server from the repo configs, then keep users.json in a temp dir"""
+    server = TextSpaceServer()
+    counter = WriteCounter(server_web_only.write_json_file)
+    cwd = os.getcwd()
+    server_web_only.write_json_file = counter
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                test(server, counter)
+            finally:
+                server._user_writer.shutdown(wait=True)
+                os.chdir(cwd)
+    finally:
+        server_web_only.write_json_file = counter.write
+
+
+def wait_for_writer(server):
+    """Block until every write queued so far has finished"""
+    server._user_writer.submit(lambda: None).result()
+
+
+def read_users():
+    with open('users.json') as f:
+        return json.load(f)
+
+
+def test_burst_of_saves_is_one_write():
+    def test(server, counter):
+        users = [WebUser(name=f"tester{i}", session_id=f"test_{i}") for i in range(3)]
+        for step in range(20):
+            for user in users:
+                user.inventory = [f"item_{step}"]
+                server.save_user_data(user)
+
+        # Nothing is written until the delay runs out...
+        assert counter.snapshots == []
+        wait_for_writer(server)
+
+        # ...and then everything goes out in a single write
+        assert len(counter.snapshots) == 1, f"expected 1 write, got {len(counter.snapshots)}"
+        saved = read_users()
+        assert sorted(saved) == ["tester0", "tester1", "tester2"]
+        assert all(record['inventory'] == ["item_19"] for record in saved.values())
+    run_in_temp_dir(test)
+    print("✓ 60 saves from 3 users produce one users.json write")
+
+
+def test_batch_size_writes_immediately():
+    def test(server, counter):
+        for i in range(USER_SAVE_BATCH):
+            server.save_user_data(WebUser(name=f"user{i}", session_id=f"test_{i}"))
+
+        # Well before USER_SAVE_DELAY would have run out
+        assert counter.written.wait(USER_SAVE_DELAY / 2), "batch did not flush early"
+        wait_for_writer(server)
+        assert len(counter.snapshots) == 1
+        assert len(read_users()) == USER_SAVE_BATCH
+    run_in_temp_dir(test)
+    print(f"✓ {USER_SAVE_BATCH} dirty users flush without waiting out the delay")
+
+
+def test_disconnect_flushes_pending_save():
+    def test(server, counter):
+        user = WebUser(name="tester1", session_id="test_1", room_id="lobby")
+        server.web_users[user.name] = user
+        server.web_sessions[user.session_id] = user.name
+        server.save_user_data(user)
+
+        user.room_id = "garden"
+        user.inventory = ["magic_book"]
+        server.handle_user_disconnect(user.name, user.session_id)
+
+        assert counter.written.wait(USER_SAVE_DELAY / 2), "disconnect did not flush"
+        wait_for_writer(server)
+        assert len(counter.snapshots) == 1
+        record = read_users()["tester1"]
+        assert record['room_id'] == "garden"
+        assert record['inventory'] == ["magic_book"]
+    run_in_temp_dir(test)
+    print("✓ Disconnect writes the pending save straight away")
+
+
+if __name__ == '__main__':
+    test_burst_of_saves_is_one_write()
+    test_batch_size_writes_immediately()
+    test_disconnect_flushes_pending_save()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Test the JSON sidecar cache used when loading the world YAML files"""
+
+import json
+import os
+import tempfile
+
+from server_web_only import load_yaml_json_cached
+
+
+def write(path, text):
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+def read_cache(path):
+    with open(f"{path}.cache.json") as f:
+        return json.load(f)
+
+
+def test_cache_miss_then_hit():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rooms.yaml')
+        write(path, "rooms:\n  lobby:\n    name: Lobby\n")
+
+        # Miss: parses the YAML and writes the sidecar
+        data = load_yaml_json_cached(path)
+        assert data == {'rooms': {'lobby': {'name': 'Lobby'}}}
+        cached = read_cache(path)
+        assert cached['data'] == data
+
+        # Hit: the sidecar is used as long as its hash matches, which we can
+        # see by planting different data under the same hash
+        cached['data'] = {'rooms': {'from_cache': {'name': 'Cached'}}}
+        write(f"{path}.cache.json", json.dumps(cached))
+        assert load_yaml_json_cached(path) == cached['data']
+
+        # Each call returns fresh objects, so callers may mutate them
+        first = load_yaml_json_cached(path)
+        first['rooms'].clear()
+        assert load_yaml_json_cached(path) == cached['data']
+    print("✓ Cache miss writes the sidecar, later loads use it")
+
+
+def test_changed_source_reparses():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'items.yaml')
+        write(path, "items:\n  coin:\n    name: Coin\n")
+        load_yaml_json_cached(path)
+        old_hash = read_cache(path)['source_sha1']
+
+        # Same size and (after restoring it) same mtime - only the hash differs
+        stat = os.stat(path)
+        write(path, "items:\n  gem_:\n    name: Gem_\n")
+        os.utime(path, (stat.st_atime, stat.st_mtime))
+
+        assert load_yaml_json_cached(path) == {'items': {'gem_': {'name': 'Gem_'}}}
+        assert read_cache(path)['source_sha1'] != old_hash
+    print("✓ Changed source content invalidates the sidecar")
+
+
+def test_corrupt_sidecar_is_ignored():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bots.yaml')
+        write(path, "bots:\n  guide:\n    room: garden\n")
+        expected = {'bots': {'guide': {'room': 'garden'}}}
+
+        for junk in ('{not json', '[]', '{"data": {}}', '{"source_sha1": 1}'):
+            write(f"{path}.cache.json", junk)
+            assert load_yaml_json_cached(path) == expected, junk
+            # ...and is replaced with a good one
+            assert read_cache(path)['data'] == expected
+    print("✓ Corrupt or malformed sidecars are reparsed and rewritten")
+
+
+def test_data_json_cannot_represent_is_not_cached():
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = {
+            'dates.yaml': "released: 2024-01-02\n",
+            'int_keys.yaml': "levels:\n  1: easy\n  2: hard\n",
+        }
+        for name, text in cases.items():
+            path = os.path.join(tmp, name)
+            write(path, text)
+            data = load_yaml_json_cached(path)
+            assert not os.path.exists(f"{path}.cache.json"), name
+            # The YAML types survive because the data came from the parser
+            assert load_yaml_json_cached(path) == data
+        assert list(data['levels']) == [1, 2]
+    print("✓ Dates and non-string keys are never cached")
+
+
+if __name__ == '__main__':
+    test_cache_miss_then_hit()
+    test_changed_source_reparses()
+    test_corrupt_sidecar_is_ignored()
+    test_data_json_cannot_represent_is_not_cached()
@@ -20,6 +20,12 @@ from mcp.server import Server
 from mcp.types import Tool, TextContent, ImageContent, EmbeddedResource
 import mcp.server.stdio
 
+# Prefer the LibYAML C parser when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("textspace-remote-mcp")
@@ -78,7 +84,7 @@ class RemoteTextSpaceManager:
     def validate_yaml_config(self, config_type: str, content: str) -> Dict[str, Any]:
         """Validate YAML configuration content"""
         try:
-            data = yaml.safe_load(content)
+            data = yaml.load(content, Loader=_YamlLoader)
             
             # Basic validation based on config type
             if config_type == "rooms":